@@ -17,6 +17,7 @@
 import asyncio
 import secrets
 
+import pymongo
 from aiogram.utils import executor
 
 from src import bot
@@ -35,9 +36,17 @@ async def on_startup(webhook_path, *args):
 
     Set webhook and run background tasks.
     """
-    await tg.delete_webhook()
-    await tg.set_webhook("https://" + config.SERVER_HOST + webhook_path)
+    # New webhook replaces the old one, so there is no need to delete it first
+    await tg.set_webhook(f"https://{config.SERVER_HOST}{webhook_path}")
     await database.users.create_index("referral_code", unique=True, sparse=True)
+    # Escrow message handlers find offer by user expected to send input
+    await database.escrow.create_index("pending_input_from", sparse=True)
+    # Order book queries filter by expiration time and user's orders are
+    # listed from the newest
+    await database.orders.create_index("expiration_time")
+    await database.orders.create_index(
+        [("user_id", pymongo.ASCENDING), ("start_time", pymongo.DESCENDING)]
+    )
     asyncio.create_task(notifications.run_loop())
     asyncio.create_task(connect_to_blockchains())
 
@@ -15,9 +15,14 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with TellerBot.  If not, see <https://www.gnu.org/licenses/>.
 import asyncio
+import atexit
 import logging
 import typing
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from queue import SimpleQueue
 from time import time
+from types import MappingProxyType
 
 from aiogram import Bot
 from aiogram import types
@@ -100,19 +105,23 @@ class DispatcherManual(Dispatcher):
             user = update.callback_query.from_user
             chat = update.callback_query.message.chat
         if user:
-            await database.users.update_many(
-                {"id": {"$ne": user.id}, "mention": user.mention},
-                {"$set": {"has_username": False}},
-            )
-            document = await database.users.find_one_and_update(
-                {"id": user.id, "chat": chat.id},
-                {
-                    "$set": {
-                        "mention": user.mention,
-                        "has_username": bool(user.username),
-                    }
-                },
-                return_document=ReturnDocument.AFTER,
+            # Other users are updated independently of the current one,
+            # so both queries are sent at once
+            _, document = await asyncio.gather(
+                database.users.update_many(
+                    {"id": {"$ne": user.id}, "mention": user.mention},
+                    {"$set": {"has_username": False}},
+                ),
+                database.users.find_one_and_update(
+                    {"id": user.id, "chat": chat.id},
+                    {
+                        "$set": {
+                            "mention": user.mention,
+                            "has_username": bool(user.username),
+                        }
+                    },
+                    return_document=ReturnDocument.AFTER,
+                ),
             )
             if document is None:
                 if update.message:
@@ -137,6 +146,29 @@ class DispatcherManual(Dispatcher):
 tg = TellerBot(None, loop=asyncio.get_event_loop(), validate_token=False)
 dp = DispatcherManual(tg)
 
+log = logging.getLogger(__name__)
+#: Running background tasks referenced until they are done.
+background_tasks: typing.Set[asyncio.Task] = set()
+
+
+def _finish_background_task(task: asyncio.Task) -> None:
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log.error("Error in background task", exc_info=task.exception())
+
+
+def create_background_task(
+    coroutine: typing.Coroutine[typing.Any, typing.Any, typing.Any]
+) -> asyncio.Task:
+    """Run ``coroutine`` as task which logs its exception on failure.
+
+    Task is referenced until it is done, so it isn't garbage collected.
+    """
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(_finish_background_task)
+    return task
+
 
 def setup():
     """Set API token from config to bot and setup dispatcher."""
@@ -148,35 +180,46 @@ def setup():
     i18n.reload()
     dp.middleware.setup(i18n)
 
-    logging.basicConfig(level=config.LOGGER_LEVEL)
+    # Write logs in separate thread to not block event loop
+    log_queue: SimpleQueue = SimpleQueue()
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    atexit.register(listener.stop)
+    logging.basicConfig(level=config.LOGGER_LEVEL, handlers=[QueueHandler(log_queue)])
     dp.middleware.setup(LoggingMiddleware())
     if config.DATABASE_LOGGING_ENABLED:
         dp.middleware.setup(IncomingHistoryMiddleware())
 
 
+def is_private(message: types.Message, private: str = types.ChatType.PRIVATE) -> bool:
+    """Check if ``message`` is sent in private chat.
+
+    Chat type is bound to default argument to avoid attribute lookups
+    on every incoming message.
+    """
+    return message.chat.type == private
+
+
 def private_handler(*args, **kwargs):
     """Register handler only for private message."""
 
     def decorator(handler: typing.Callable):
-        dp.register_message_handler(
-            handler,
-            lambda message: message.chat.type == types.ChatType.PRIVATE,  # noqa: E721
-            *args,
-            **kwargs
-        )
+        dp.register_message_handler(handler, is_private, *args, **kwargs)
         return handler
 
     return decorator
 
 
-state_handlers = {}
+_state_handlers: typing.Dict[str, typing.Callable] = {}
+#: Read-only view of handlers associated with states by ``state_handler``.
+state_handlers = MappingProxyType(_state_handlers)
 
 
 def state_handler(state):
     """Associate ``state`` with decorated handler."""
 
     def decorator(handler):
-        state_handlers[state.state] = handler
+        _state_handlers[state.state] = handler
         return handler
 
     return decorator
@@ -23,6 +23,8 @@ DEFAULT_VALUES = {
     "DATABASE_HOST": "127.0.0.1",
     "DATABASE_PORT": 27017,
     "DATABASE_NAME": "tellerbot",
+    "DATABASE_MAX_POOL_SIZE": 100,
+    "DATABASE_MIN_POOL_SIZE": 10,
     "ESCROW_ENABLED": False,
 }
 
@@ -23,6 +23,11 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from src.config import config
 
 
+# Handlers gather independent queries, so they shouldn't wait for connections
+pool_options = {
+    "maxPoolSize": config.DATABASE_MAX_POOL_SIZE,
+    "minPoolSize": config.DATABASE_MIN_POOL_SIZE,
+}
 try:
     with open(config.DATABASE_PASSWORD_FILENAME, "r") as password_file:
         client = AsyncIOMotorClient(
@@ -32,10 +37,11 @@ try:
                 username=config.DATABASE_USERNAME,
                 password=password_file.read().strip(),
                 name=config.DATABASE_NAME,
-            )
+            ),
+            **pool_options,
         )
 except (AttributeError, FileNotFoundError):
-    client = AsyncIOMotorClient(config.DATABASE_HOST)
+    client = AsyncIOMotorClient(config.DATABASE_HOST, **pool_options)
 database = client[config.DATABASE_NAME]
 
 database_user: ContextVar[typing.Mapping[str, typing.Any]] = ContextVar("database_user")
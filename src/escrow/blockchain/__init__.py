@@ -15,10 +15,12 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with TellerBot.  If not, see <https://www.gnu.org/licenses/>.
 import json
+import re
 import typing
 from abc import ABC
 from abc import abstractmethod
 from asyncio import create_task
+from asyncio import gather
 from asyncio import get_running_loop
 from decimal import Decimal
 from time import time
@@ -26,13 +28,36 @@ from time import time
 from aiogram.types import InlineKeyboardButton
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.types import ParseMode
-from aiogram.utils import markdown
 from bson.objectid import ObjectId
 
+from src.bot import create_background_task
 from src.bot import tg
 from src.config import config
 from src.database import database
+from src.escrow.escrow_offer import forget_offer
+from src.escrow.escrow_offer import update_offer
 from src.i18n import i18n
+from src.i18n import static_i18n
+
+#: Message IDs of refund reasons.
+REFUND_REASONS = {
+    "asset": "wrong_asset",
+    "amount": "wrong_amount",
+    "memo": "wrong_memo",
+}
+
+#: Special characters of Telegram's legacy Markdown.
+MARKDOWN_SPECIAL = re.compile(r"([_*`\[])")
+
+
+def escape_markdown(text: str) -> str:
+    """Escape ``text`` to be displayed literally with ``ParseMode.MARKDOWN``."""
+    return MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+def markdown_link(title: str, url: str) -> str:
+    """Format Markdown link to ``url`` with escaped ``title``."""
+    return f"[{escape_markdown(title)}]({url})"
 
 
 class InsuranceLimits(typing.NamedTuple):
@@ -47,6 +72,8 @@ class InsuranceLimits(typing.NamedTuple):
 class BaseBlockchain(ABC):
     """Abstract class to represent blockchain node client for escrow exchange."""
 
+    __slots__ = ("_explorer_prefix", "_explorer_suffix")
+
     #: Internal name of blockchain referenced in ``config.ESCROW_FILENAME``.
     name: str
     #: Frozen set of assets supported by blockchain.
@@ -57,6 +84,12 @@ class BaseBlockchain(ABC):
     #: contain ``{}`` which gets replaced with transaction id.
     explorer: str = "{}"
 
+    def __init__(self):
+        """Split ``explorer`` template around transaction ID placeholder."""
+        if self.explorer.count("{}") != 1:
+            raise ValueError("explorer template should contain exactly one {}")
+        self._explorer_prefix, self._explorer_suffix = self.explorer.split("{}")
+
     @abstractmethod
     async def connect(self) -> None:
         """Establish connection with blockchain node."""
@@ -132,7 +165,7 @@ class BaseBlockchain(ABC):
 
     def trx_url(self, trx_id: str) -> str:
         """Get URL on transaction with ID ``trx_id`` on explorer."""
-        return self.explorer.format(trx_id)
+        return self._explorer_prefix + trx_id + self._explorer_suffix
 
     async def create_queue(self) -> typing.List[typing.Dict[str, typing.Any]]:
         """Create queue from unconfirmed transactions in database."""
@@ -194,6 +227,7 @@ class BaseBlockchain(ABC):
     async def _check_timeout(self, offer_id: ObjectId) -> None:
         """Timeout transaction check."""
         offer = await database.escrow.find_one_and_delete({"_id": offer_id})
+        forget_offer(offer_id)
         await database.escrow_archive.insert_one(offer)
         await tg.send_message(
             offer["init"]["id"],
@@ -221,16 +255,33 @@ class BaseBlockchain(ABC):
         If it is, continue exchange. If it is not, send warning and
         update ``transaction_time`` of escrow offer.
 
+        Callback is called from blockchain stream or history check
+        rather than in response to update, so both notifications are
+        sent as separate requests and can't be replied in webhook.
+
         :param offer_id: ``_id`` of escrow offer.
         :param op: Operation object to confirm.
         :param trx_id: ID of transaction with desired operation.
         :param block_num: Number of block to confirm.
         :return: True if transaction was confirmed and False otherwise.
         """
-        offer = await database.escrow.find_one({"_id": offer_id})
+        offer = await database.escrow.find_one(
+            {"_id": offer_id},
+            projection={
+                "type": True,
+                "init": True,
+                "counter": True,
+                "buy": True,
+                "sell": True,
+                "sum_buy": True,
+                "sum_sell": True,
+            },
+        )
         if not offer:
             return False
 
+        # Wait for confirmation while sender is being notified
+        confirmation = create_task(self.is_block_confirmed(block_num, op))
         if offer["type"] == "buy":
             new_currency = "sell"
             escrow_user = offer["init"]
@@ -239,48 +290,66 @@ class BaseBlockchain(ABC):
             new_currency = "buy"
             escrow_user = offer["counter"]
             other_user = offer["init"]
+        escrow_locale = escrow_user["locale"]
+        other_locale = other_user["locale"]
 
-        answer = i18n(
-            "transaction_passed {currency}", locale=escrow_user["locale"]
-        ).format(currency=offer[new_currency])
-        await tg.send_message(escrow_user["id"], answer)
-        is_confirmed = await create_task(self.is_block_confirmed(block_num, op))
+        answer = i18n("transaction_passed {currency}", locale=escrow_locale).format(
+            currency=offer[new_currency]
+        )
+        try:
+            await tg.send_message(escrow_user["id"], answer)
+        except BaseException:
+            confirmation.cancel()
+            raise
+        is_confirmed = await confirmation
         if is_confirmed:
-            await database.escrow.update_one(
-                {"_id": offer["_id"]}, {"$set": {"trx_id": trx_id, "unsent": True}}
-            )
             keyboard = InlineKeyboardMarkup()
             keyboard.add(
                 InlineKeyboardButton(
-                    i18n("sent", locale=other_user["locale"]),
-                    callback_data="tokens_sent {}".format(offer["_id"]),
+                    static_i18n("sent", other_locale),
+                    callback_data=f"tokens_sent {offer['_id']}",
                 )
             )
-            answer = markdown.link(
-                i18n("transaction_confirmed", locale=other_user["locale"]),
-                self.trx_url(trx_id),
+            send_template = i18n(
+                "send {amount} {currency} {address}", locale=other_locale
             )
-            answer += "\n" + i18n(
-                "send {amount} {currency} {address}", locale=other_user["locale"]
-            ).format(
-                amount=offer[f"sum_{new_currency}"],
-                currency=offer[new_currency],
-                address=markdown.escape_md(escrow_user["receive_address"]),
+            answer = "\n".join(
+                [
+                    markdown_link(
+                        static_i18n("transaction_confirmed", other_locale),
+                        self.trx_url(trx_id),
+                    ),
+                    send_template.format(
+                        amount=offer[f"sum_{new_currency}"],
+                        currency=offer[new_currency],
+                        address=escape_markdown(escrow_user["receive_address"]),
+                    )
+                    + ".",
+                ]
             )
-            answer += "."
-            await tg.send_message(
-                other_user["id"],
-                answer,
-                reply_markup=keyboard,
-                parse_mode=ParseMode.MARKDOWN,
+            await gather(
+                update_offer(
+                    offer["_id"], {"$set": {"trx_id": trx_id, "unsent": True}}
+                ),
+                tg.send_message(
+                    other_user["id"],
+                    answer,
+                    reply_markup=keyboard,
+                    parse_mode=ParseMode.MARKDOWN,
+                ),
             )
             return True
 
-        await database.escrow.update_one(
-            {"_id": offer["_id"]}, {"$set": {"transaction_time": time()}}
+        answer = " ".join(
+            [
+                static_i18n("transaction_not_confirmed", escrow_locale),
+                static_i18n("try_again", escrow_locale),
+            ]
+        )
+        # Retry time is advisory, so user doesn't have to wait for it to be saved
+        create_background_task(
+            update_offer(offer["_id"], {"$set": {"transaction_time": time()}})
         )
-        answer = i18n("transaction_not_confirmed", locale=escrow_user["locale"])
-        answer += " " + i18n("try_again", locale=escrow_user["locale"])
         await tg.send_message(escrow_user["id"], answer)
         return False
 
@@ -304,34 +373,33 @@ class BaseBlockchain(ABC):
         :param amount: Amount of transferred asset.
         :param asset: Transferred asset.
         """
-        offer = await database.escrow.find_one({"_id": offer_id})
+        offer = await database.escrow.find_one(
+            {"_id": offer_id},
+            projection={"type": True, "init": True, "counter": True},
+        )
         if not offer:
             return
 
+        # Wait for confirmation while sender is being notified
+        confirmation = create_task(self.is_block_confirmed(block_num, op))
         user = offer["init"] if offer["type"] == "buy" else offer["counter"]
-        answer = i18n("transfer_mistakes", locale=user["locale"])
-        points = []
-        for reason in reasons:
-            if reason == "asset":
-                memo_point = i18n("wrong_asset", locale="en")
-                message_point = i18n("wrong_asset", locale=user["locale"])
-            elif reason == "amount":
-                memo_point = i18n("wrong_amount", locale="en")
-                message_point = i18n("wrong_amount", locale=user["locale"])
-            elif reason == "memo":
-                memo_point = i18n("wrong_memo", locale="en")
-                message_point = i18n("wrong_memo", locale=user["locale"])
-            else:
-                continue
-            points.append(memo_point)
-            answer += f"\n• {message_point}"
-
-        answer += "\n\n" + i18n("refund_promise", locale=user["locale"])
-        await tg.send_message(user["id"], answer, parse_mode=ParseMode.MARKDOWN)
-        is_confirmed = await create_task(self.is_block_confirmed(block_num, op))
-        await database.escrow.update_one(
-            {"_id": offer["_id"]}, {"$set": {"transaction_time": time()}}
+        locale = user["locale"]
+        reason_ids = [REFUND_REASONS[r] for r in reasons if r in REFUND_REASONS]
+        points = [static_i18n(reason_id, "en") for reason_id in reason_ids]
+        answer = "\n".join(
+            [
+                static_i18n("transfer_mistakes", locale),
+                *("• " + static_i18n(r, locale) for r in reason_ids),
+                "",
+                static_i18n("refund_promise", locale),
+            ]
         )
+        try:
+            await tg.send_message(user["id"], answer, parse_mode=ParseMode.MARKDOWN)
+        except BaseException:
+            confirmation.cancel()
+            raise
+        is_confirmed = await confirmation
         if is_confirmed:
             trx_url = await self.transfer(
                 from_address,
@@ -339,19 +407,38 @@ class BaseBlockchain(ABC):
                 asset,
                 memo="reason of refund: " + ", ".join(points),
             )
-            answer = markdown.link(
-                i18n("transaction_refunded", locale=user["locale"]), trx_url
-            )
+            status = markdown_link(static_i18n("transaction_refunded", locale), trx_url)
         else:
-            answer = i18n("transaction_not_confirmed", locale=user["locale"])
-        answer += " " + i18n("try_again", locale=user["locale"])
+            status = static_i18n("transaction_not_confirmed", locale)
+        answer = " ".join([status, static_i18n("try_again", locale)])
+        create_background_task(
+            update_offer(offer["_id"], {"$set": {"transaction_time": time()}})
+        )
         await tg.send_message(user["id"], answer, parse_mode=ParseMode.MARKDOWN)
 
 
 class StreamBlockchain(BaseBlockchain):
     """Blockchain node client supporting continuous stream to check transaction."""
 
-    _queue: typing.List[typing.Dict[str, typing.Any]] = []
+    __slots__ = ("_queue", "_queue_index")
+
+    def __init__(self):
+        """Initialize empty queue of transactions."""
+        super().__init__()
+        #: Transactions being checked mapped by ``_id`` of their escrow offers.
+        #: Dictionary preserves insertion order, so queue is checked in FIFO order.
+        self._queue: typing.Dict[ObjectId, typing.Dict[str, typing.Any]] = {}
+        #: Members of ``self._queue`` grouped by lowercase sender address.
+        self._queue_index: typing.Dict[
+            str, typing.Dict[ObjectId, typing.Dict[str, typing.Any]]
+        ] = {}
+
+    def _add_queue_member(self, queue_member: typing.Dict[str, typing.Any]) -> None:
+        """Add ``queue_member`` to ``self._queue`` and ``self._queue_index``."""
+        offer_id = queue_member["offer_id"]
+        self._queue[offer_id] = queue_member
+        address = queue_member["from_address"].lower()
+        self._queue_index.setdefault(address, {})[offer_id] = queue_member
 
     def remove_from_queue(
         self, offer_id: ObjectId
@@ -359,15 +446,19 @@ class StreamBlockchain(BaseBlockchain):
         """Remove transaction with specified ``offer_id`` value from ``self._queue``.
 
         :param offer_id: ``_id`` of escrow offer.
-        :return: True if transaction was found and False otherwise.
+        :return: Removed queue member if transaction was found and None otherwise.
         """
-        for queue_member in self._queue:
-            if queue_member["offer_id"] == offer_id:
-                if "timeout_handler" in queue_member:
-                    queue_member["timeout_handler"].cancel()
-                self._queue.remove(queue_member)
-                return queue_member
-        return None
+        queue_member = self._queue.pop(offer_id, None)
+        if not queue_member:
+            return None
+        address = queue_member["from_address"].lower()
+        address_members = self._queue_index[address]
+        del address_members[offer_id]
+        if not address_members:
+            del self._queue_index[address]
+        if "timeout_handler" in queue_member:
+            queue_member["timeout_handler"].cancel()
+        return queue_member
 
     def check_timeout(self, offer_id: ObjectId) -> None:
         self.remove_from_queue(offer_id)
@@ -397,7 +488,7 @@ class StreamBlockchain(BaseBlockchain):
         queue_member = await self.schedule_timeout(kwargs)
         if not queue_member:
             return
-        self._queue.append(queue_member)
+        self._add_queue_member(queue_member)
         # Start streaming if not already streaming
         if len(self._queue) == 1:
             self.start_streaming()
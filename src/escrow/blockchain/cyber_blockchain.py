@@ -100,6 +100,8 @@ class CyberWayTransaction(types.Transaction):
 class CyberBlockchain(BaseBlockchain):
     """Golos node client implementation for escrow exchange."""
 
+    __slots__ = ("_session", "_node")
+
     name = "cyber"
     assets = frozenset(["CYBER", "CYBER.GOLOS"])
     address = "usr11jwlrakn"
@@ -38,6 +38,8 @@ from src.escrow.blockchain import TransferError
 class GolosBlockchain(StreamBlockchain):
     """Golos node client implementation for escrow exchange."""
 
+    __slots__ = ("_golos", "_stream")
+
     name = "golos"
     assets = frozenset(["GOLOS", "GBG"])
     address = "tellerbot"
@@ -76,7 +78,8 @@ class GolosBlockchain(StreamBlockchain):
                 queue.remove(req)
                 if not queue:
                     return
-        self._queue.extend(queue)
+        for req in queue:
+            self._add_queue_member(req)
 
     async def get_limits(self, asset: str):
         limits = {"GOLOS": InsuranceLimits(Decimal("10000"), Decimal("100000"))}
@@ -145,7 +148,7 @@ class GolosBlockchain(StreamBlockchain):
                         req["offer_id"], op, trx_id, block_num
                     )
                     if is_confirmed:
-                        self._queue.remove(req)
+                        self.remove_from_queue(req["offer_id"])
             if not self._queue:
                 await loop.run_in_executor(None, self._stream.rpc.close)
                 return
@@ -163,7 +166,9 @@ class GolosBlockchain(StreamBlockchain):
         queue: typing.Optional[typing.List] = None,
     ):
         if queue is None:
-            queue = self._queue
+            # Only transactions from sender of operation can match it.
+            # Copy values because queue can change while waiting for refund.
+            queue = list(self._queue_index.get(op["from"], {}).values())
         op_amount, asset = op["amount"].split()
         amount = Decimal(op_amount)
         for req in queue:
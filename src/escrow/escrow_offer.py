@@ -19,10 +19,17 @@ from dataclasses import dataclass
 
 from bson.decimal128 import Decimal128
 from bson.objectid import ObjectId
+from cachetools import TTLCache
 
 from src.database import database
 
 
+#: Recently loaded offer documents by their primary key.
+_offer_cache: TTLCache = TTLCache(maxsize=4096, ttl=30)
+#: Number of cache invalidations used to detect loads racing with writes.
+_invalidations = 0
+
+
 def asdict(instance):
     """Represent class instance as dictionary excluding None values."""
     return {key: value for key, value in instance.__dict__.items() if value is not None}
@@ -83,8 +90,14 @@ class EscrowOffer:
     unsent: typing.Optional[bool] = None
 
     def __getitem__(self, key: str) -> typing.Any:
-        """Allow to use class as dictionary."""
-        return asdict(self)[key]
+        """Allow to use class as dictionary.
+
+        Fields set to None are missing like in ``asdict`` representation.
+        """
+        value = self.__dict__.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
 
     async def insert_document(self) -> None:
         """Convert self to document and insert to database."""
@@ -96,9 +109,51 @@ class EscrowOffer:
         :param update: Document with update operators or aggregation
             pipeline sent to MongoDB.
         """
-        await database.escrow.update_one({"_id": self._id}, update)
+        await update_offer(self._id, update)
 
     async def delete_document(self) -> None:
         """Archive and delete corresponding document in database."""
         await database.escrow_archive.insert_one(asdict(self))
         await database.escrow.delete_one({"_id": self._id})
+        forget_offer(self._id)
+
+
+async def get_offer(offer_id: ObjectId) -> typing.Optional[EscrowOffer]:
+    """Get offer with primary key ``offer_id`` from cache or database."""
+    document = _offer_cache.get(offer_id)
+    if document is None:
+        invalidations = _invalidations
+        document = await database.escrow.find_one({"_id": offer_id})
+        if document is None:
+            return None
+        # Don't cache document which could have been changed while loading
+        if invalidations == _invalidations:
+            _offer_cache[offer_id] = document
+    return EscrowOffer(**document)
+
+
+async def update_offer(offer_id: ObjectId, update) -> None:
+    """Update offer document with primary key ``offer_id`` and invalidate its cache.
+
+    :param update: Document with update operators or aggregation
+        pipeline sent to MongoDB.
+    """
+    try:
+        await database.escrow.update_one({"_id": offer_id}, update)
+    finally:
+        # Failed write could still have been applied
+        forget_offer(offer_id)
+
+
+def forget_offer(offer_id: typing.Optional[ObjectId] = None) -> None:
+    """Remove offer with primary key ``offer_id`` from cache.
+
+    Clear the whole cache if ``offer_id`` is None, which should be done
+    after writes to offers with unknown primary keys.
+    """
+    global _invalidations
+    _invalidations += 1
+    if offer_id is None:
+        _offer_cache.clear()
+    else:
+        _offer_cache.pop(offer_id, None)
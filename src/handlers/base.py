@@ -23,6 +23,7 @@ from time import time
 from aiogram import types
 from aiogram.utils import markdown
 from aiogram.utils.emoji import emojize
+from cachetools import TTLCache
 from pymongo.cursor import Cursor
 
 from src.config import config
@@ -39,6 +40,9 @@ from src.database import database, database_user
 from src.i18n import i18n
 from src.money import normalize
 
+#: Recently shown order documents by their primary key.
+order_cache: TTLCache = TTLCache(maxsize=2048, ttl=30)
+
 
 def start_keyboard() -> types.ReplyKeyboardMarkup:
     """Create reply keyboard with main menu."""
@@ -107,7 +111,7 @@ async def orders_list(
     user = database_user.get()
     if invert is None:
         invert = user.get("invert_book", False)
-    else:
+    elif invert != user.get("invert_book", False):
         await database.users.update_one(
             {"_id": user["_id"]}, {"$set": {"invert_book": invert}}
         )
@@ -117,14 +121,14 @@ async def orders_list(
     inline_orders_buttons = (
         types.InlineKeyboardButton(
             emojize(":arrow_left:"),
-            callback_data="{} {} {}".format(
-                buttons_data, start - config.ORDERS_COUNT, 1 if invert else 0
+            callback_data=(
+                f"{buttons_data} {start - config.ORDERS_COUNT} {1 if invert else 0}"
             ),
         ),
         types.InlineKeyboardButton(
             emojize(":arrow_right:"),
-            callback_data="{} {} {}".format(
-                buttons_data, start + config.ORDERS_COUNT, 1 if invert else 0
+            callback_data=(
+                f"{buttons_data} {start + config.ORDERS_COUNT} {1 if invert else 0}"
             ),
         ),
     )
@@ -183,14 +187,14 @@ async def orders_list(
         lines.append(f"{i + 1}. {line}")
         buttons.append(
             types.InlineKeyboardButton(
-                "{}".format(i + 1), callback_data="get_order {}".format(order["_id"])
+                f"{i + 1}", callback_data=f"get_order {order['_id']}"
             )
         )
 
     keyboard.row(
         types.InlineKeyboardButton(
             i18n("invert"),
-            callback_data="{} {} {}".format(buttons_data, start, int(not invert)),
+            callback_data=f"{buttons_data} {start} {int(not invert)}",
         )
     )
     keyboard.add(*buttons)
@@ -249,6 +253,7 @@ async def show_order(
     :param edit: Enter edit mode.
     :param locale: Locale of message receiver.
     """
+    order_cache[order["_id"]] = order
     if locale is None:
         locale = i18n.ctx_locale.get()
 
@@ -347,15 +352,13 @@ async def show_order(
         lines_format["comments"] = "«{}»".format(order["comments"])
 
     keyboard = types.InlineKeyboardMarkup(row_width=6)
+    order_data = f"{order['_id']} {location_message_id}"
 
     keyboard.row(
         types.InlineKeyboardButton(
             i18n("invert", locale=locale),
-            callback_data="{} {} {} {}".format(
-                "revert" if invert else "invert",
-                order["_id"],
-                location_message_id,
-                int(edit),
+            callback_data=(
+                f"{'revert' if invert else 'invert'} {order_data} {int(edit)}"
             ),
         )
     )
@@ -370,8 +373,8 @@ async def show_order(
             buttons.append(
                 types.InlineKeyboardButton(
                     f"{i + 1}",
-                    callback_data="edit {} {} {} 0".format(
-                        order["_id"], field, location_message_id
+                    callback_data=(
+                        f"edit {order['_id']} {field} {location_message_id} 0"
                     ),
                 )
             )
@@ -380,9 +383,7 @@ async def show_order(
         keyboard.row(
             types.InlineKeyboardButton(
                 i18n("finish", locale=locale),
-                callback_data="{} {} {} 0".format(
-                    "invert" if invert else "revert", order["_id"], location_message_id
-                ),
+                callback_data=f"{'invert' if invert else 'revert'} {order_data} 0",
             )
         )
 
@@ -394,11 +395,11 @@ async def show_order(
         keyboard.row(
             types.InlineKeyboardButton(
                 i18n("similar", locale=locale),
-                callback_data="similar {}".format(order["_id"]),
+                callback_data=f"similar {order['_id']}",
             ),
             types.InlineKeyboardButton(
                 i18n("match", locale=locale),
-                callback_data="match {}".format(order["_id"]),
+                callback_data=f"match {order['_id']}",
             ),
         )
 
@@ -406,17 +407,11 @@ async def show_order(
             keyboard.row(
                 types.InlineKeyboardButton(
                     i18n("edit", locale=locale),
-                    callback_data="{} {} {} 1".format(
-                        "invert" if invert else "revert",
-                        order["_id"],
-                        location_message_id,
-                    ),
+                    callback_data=f"{'invert' if invert else 'revert'} {order_data} 1",
                 ),
                 types.InlineKeyboardButton(
                     i18n("delete", locale=locale),
-                    callback_data="delete {} {}".format(
-                        order["_id"], location_message_id
-                    ),
+                    callback_data=f"delete {order_data}",
                 ),
             )
             keyboard.row(
@@ -424,14 +419,12 @@ async def show_order(
                     i18n("unarchive", locale=locale)
                     if order.get("archived")
                     else i18n("archive", locale=locale),
-                    callback_data="archive {} {}".format(
-                        order["_id"], location_message_id
-                    ),
+                    callback_data=f"archive {order_data}",
                 ),
                 types.InlineKeyboardButton(
                     i18n("change_duration", locale=locale),
-                    callback_data="edit {} duration {} 1".format(
-                        order["_id"], location_message_id
+                    callback_data=(
+                        f"edit {order['_id']} duration {location_message_id} 1"
                     ),
                 ),
             )
@@ -443,14 +436,14 @@ async def show_order(
                 keyboard.row(
                     types.InlineKeyboardButton(
                         i18n("escrow", locale=locale),
-                        callback_data="escrow {} sum_buy 0".format(order["_id"]),
+                        callback_data=f"escrow {order['_id']} sum_buy 0",
                     )
                 )
 
         keyboard.row(
             types.InlineKeyboardButton(
                 i18n("hide", locale=locale),
-                callback_data="hide {}".format(location_message_id),
+                callback_data=f"hide {location_message_id}",
             )
         )
 
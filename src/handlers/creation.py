@@ -24,7 +24,6 @@ with ``private_handler`` are called when user sends value.
 import asyncio
 import re
 from datetime import datetime
-from decimal import Decimal
 from time import time
 from typing import Any
 from typing import Mapping
@@ -56,6 +55,7 @@ from src.i18n import i18n
 from src.money import money
 from src.money import MoneyValueError
 from src.money import normalize
+from src.money import ONE
 from src.notifications import order_notification
 from src.states import OrderCreation
 
@@ -141,9 +141,7 @@ async def get_currency_with_gateway(currency_type: str, message: types.Message):
         keyboard.row(
             InlineKeyboardButton(
                 i18n("request_whitelisting"),
-                callback_data="whitelisting_request {}.{}".format(
-                    gateway, order[currency_type]
-                ),
+                callback_data=f"whitelisting_request {gateway}.{order[currency_type]}",
             )
         )
         keyboard.row(InlineKeyboardButton(i18n("cancel"), callback_data="cancel"))
@@ -484,12 +482,12 @@ async def choose_price(message: types.Message, state: FSMContext):
     if order["price_currency"] == "sell":
         update_dict = {
             "price_sell": Decimal128(price),
-            "price_buy": Decimal128(normalize(Decimal(1) / price)),
+            "price_buy": Decimal128(normalize(ONE / price)),
         }
     else:
         update_dict = {
             "price_buy": Decimal128(price),
-            "price_sell": Decimal128(normalize(Decimal(1) / price)),
+            "price_sell": Decimal128(normalize(ONE / price)),
         }
 
     order = await database.creation.find_one_and_update(
@@ -765,7 +763,7 @@ async def text_location(message: types.Message, state: FSMContext):
         buttons.append(
             InlineKeyboardButton(
                 f"{i + 1}",
-                callback_data="location {} {}".format(result["lat"], result["lon"]),
+                callback_data=f"location {result['lat']} {result['lon']}",
             )
         )
     keyboard.add(*buttons)
@@ -19,12 +19,16 @@ import asyncio
 import typing
 from dataclasses import replace
 from decimal import Decimal
+from functools import lru_cache
 from functools import wraps
 from time import time
 
 from aiogram import types
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import any_state
+from aiogram.dispatcher.filters.state import State
+from aiogram.dispatcher.handler import SkipHandler
+from aiogram.dispatcher.webhook import SendMessage
 from aiogram.types import InlineKeyboardButton
 from aiogram.types import InlineKeyboardMarkup
 from aiogram.types import ParseMode
@@ -35,6 +39,7 @@ from bson.objectid import ObjectId
 
 from src import referral_system as rs
 from src import states
+from src.bot import create_background_task
 from src.bot import dp
 from src.bot import tg
 from src.config import config
@@ -43,9 +48,11 @@ from src.escrow import get_escrow_instance
 from src.escrow import SUPPORTED_BANKS
 from src.escrow.blockchain import StreamBlockchain
 from src.escrow.escrow_offer import EscrowOffer
+from src.escrow.escrow_offer import get_offer
 from src.handlers.base import private_handler
 from src.handlers.base import start_keyboard
 from src.i18n import i18n
+from src.i18n import static_i18n
 from src.money import money
 from src.money import MoneyValueError
 from src.money import normalize
@@ -70,36 +77,79 @@ async def get_card_number(
     return (first, last)
 
 
-@dp.async_task
-async def call_later(delay: float, callback: typing.Callable, *args, **kwargs):
-    """Call ``callback(*args, **kwargs)`` asynchronously after ``delay`` seconds."""
-    await asyncio.sleep(delay)
-    return await callback(*args, **kwargs)
+def call_later(delay: float, callback: typing.Callable, *args) -> asyncio.TimerHandle:
+    """Call ``callback(*args)`` asynchronously after ``delay`` seconds.
+
+    Callback runs in a copy of current context, which keeps bot token
+    set for Telegram API calls. Its exception is logged.
+    """
+    loop = asyncio.get_running_loop()
+    return loop.call_later(delay, lambda: create_background_task(callback(*args)))
+
 
+def offer_keyboard(
+    offer_id: ObjectId,
+    *buttons: typing.Tuple[str, str],
+    locale: typing.Optional[str] = None,
+) -> InlineKeyboardMarkup:
+    """Create keyboard with row of buttons calling back about offer.
 
-def escrow_callback_handler(*args, state=any_state, **kwargs):
+    :param offer_id: Primary key value of offer document added to callback data.
+    :param buttons: Pairs of message ID of button text and callback data prefix.
+    :param locale: Locale of button texts. Defaults to locale of current user.
+    """
+    if locale is None:
+        locale = i18n.ctx_locale.get()
+    keyboard = InlineKeyboardMarkup()
+    keyboard.add(
+        *[
+            InlineKeyboardButton(
+                static_i18n(text, locale), callback_data=f"{prefix} {offer_id}"
+            )
+            for text, prefix in buttons
+        ]
+    )
+    return keyboard
+
+
+#: Escrow callback query handlers with their required states by callback data prefix.
+callback_routes: typing.Dict[
+    str, typing.Tuple[typing.Callable, typing.Optional[str]]
+] = {}
+
+
+def escrow_callback_handler(prefix: str, state: typing.Optional[State] = None):
     """Simplify handling callback queries during escrow exchange.
 
-    Add offer of ``EscrowOffer`` to arguments of decorated callback query handler.
+    Route callback queries with data starting with ``prefix`` in ``state``
+    to decorated handler and add offer of ``EscrowOffer`` to its arguments.
     """
 
     def decorator(
         handler: typing.Callable[[types.CallbackQuery, EscrowOffer], typing.Any]
     ):
-        @wraps(handler)
-        @dp.callback_query_handler(*args, state=state, **kwargs)
-        async def wrapper(call: types.CallbackQuery):
-            offer_id = call.data.split()[1]
-            offer = await database.escrow.find_one({"_id": ObjectId(offer_id)})
-            if not offer:
-                await call.answer(i18n("offer_not_active"))
-                return
+        callback_routes[prefix] = (handler, state.state if state else None)
+        return handler
 
-            return await handler(call, EscrowOffer(**offer))
+    return decorator
 
-        return wrapper
 
-    return decorator
+@dp.callback_query_handler(
+    lambda call: call.data.partition(" ")[0] in callback_routes, state=any_state
+)
+async def escrow_callback_dispatcher(call: types.CallbackQuery, state: FSMContext):
+    """Find handler of escrow callback query by prefix of its data and call it."""
+    prefix, offer_id = call.data.split()[:2]
+    handler, handler_state = callback_routes[prefix]
+    if handler_state is not None and await state.get_state() != handler_state:
+        raise SkipHandler
+
+    offer = await get_offer(ObjectId(offer_id))
+    if not offer:
+        await call.answer(i18n("offer_not_active"))
+        return
+
+    return await handler(call, offer)
 
 
 def escrow_message_handler(*args, **kwargs):
@@ -147,6 +197,17 @@ async def get_insurance(offer: EscrowOffer) -> Decimal:
     return normalize(insured)
 
 
+@lru_cache(maxsize=None)
+def get_fee_multipliers() -> typing.Tuple[Decimal, Decimal]:
+    """Get multipliers of escrow sum with fee added and substracted.
+
+    Computed once on first use, because fee is configured only if escrow
+    is enabled.
+    """
+    escrow_fee = Decimal(config.ESCROW_FEE_PERCENTS) / 100
+    return 1 + escrow_fee, 1 - escrow_fee
+
+
 @escrow_message_handler(state=states.Escrow.amount)
 async def set_escrow_sum(message: types.Message, offer: EscrowOffer):
     """Set sum and ask for fee payment agreement."""
@@ -156,49 +217,49 @@ async def set_escrow_sum(message: types.Message, offer: EscrowOffer):
         await tg.send_message(message.chat.id, str(exception))
         return
 
-    order = await database.orders.find_one({"_id": offer.order})
+    new_currency = "sell" if offer.sum_currency == "sum_buy" else "buy"
+    order = await database.orders.find_one(
+        {"_id": offer.order},
+        projection={offer.sum_currency: True, f"price_{new_currency}": True},
+    )
     order_sum = order.get(offer.sum_currency)
     if order_sum and offer_sum > order_sum.to_decimal():
         await tg.send_message(message.chat.id, i18n("exceeded_order_sum"))
         return
 
     update_dict = {offer.sum_currency: Decimal128(offer_sum)}
-    new_currency = "sell" if offer.sum_currency == "sum_buy" else "buy"
     update_dict[f"sum_{new_currency}"] = Decimal128(
         normalize(offer_sum * order[f"price_{new_currency}"].to_decimal())
     )
-    escrow_sum = update_dict[f"sum_{offer.type}"]
-    escrow_fee = Decimal(config.ESCROW_FEE_PERCENTS) / Decimal("100")
-    update_dict["sum_fee_up"] = Decimal128(
-        normalize(escrow_sum.to_decimal() * (Decimal("1") + escrow_fee))
-    )
-    update_dict["sum_fee_down"] = Decimal128(
-        normalize(escrow_sum.to_decimal() * (Decimal("1") - escrow_fee))
-    )
+    escrow_sum = update_dict[f"sum_{offer.type}"].to_decimal()
+    fee_up, fee_down = get_fee_multipliers()
+    update_dict["sum_fee_up"] = Decimal128(normalize(escrow_sum * fee_up))
+    update_dict["sum_fee_down"] = Decimal128(normalize(escrow_sum * fee_down))
     offer = replace(offer, **update_dict)  # type: ignore
 
+    replies = []
     if offer.sum_currency == offer.type:
         insured = await get_insurance(offer)
         update_dict["insured"] = Decimal128(insured)
         if offer_sum > insured:
-            keyboard = InlineKeyboardMarkup()
-            keyboard.add(
-                InlineKeyboardButton(
-                    i18n("continue"), callback_data=f"accept_insurance {offer._id}"
-                ),
-                InlineKeyboardButton(
-                    i18n("cancel"), callback_data=f"init_cancel {offer._id}"
-                ),
+            keyboard = offer_keyboard(
+                offer._id, ("continue", "accept_insurance"), ("cancel", "init_cancel")
             )
             answer = i18n("exceeded_insurance {amount} {currency}").format(
                 amount=insured, currency=offer.escrow
             )
             answer += "\n" + i18n("exceeded_insurance_options")
-            await tg.send_message(message.chat.id, answer, reply_markup=keyboard)
+            replies.append(
+                tg.send_message(message.chat.id, answer, reply_markup=keyboard)
+            )
     else:
-        await ask_fee(message.from_user.id, message.chat.id, offer)
+        replies.append(ask_fee(message.from_user.id, message.chat.id, offer))
 
-    await offer.update_document({"$set": update_dict, "$unset": {"sum_currency": True}})
+    # Update doesn't depend on replies, so they are sent concurrently
+    await asyncio.gather(
+        offer.update_document({"$set": update_dict, "$unset": {"sum_currency": True}}),
+        *replies,
+    )
 
 
 async def ask_fee(user_id: int, chat_id: int, offer: EscrowOffer):
@@ -213,27 +274,19 @@ async def ask_fee(user_id: int, chat_id: int, offer: EscrowOffer):
     else:
         answer += i18n("will_get {amount} {currency}")
         sum_fee_field = "sum_fee_down"
-    keyboard = InlineKeyboardMarkup()
-    keyboard.add(
-        InlineKeyboardButton(i18n("yes"), callback_data=f"accept_fee {offer._id}"),
-        InlineKeyboardButton(i18n("no"), callback_data=f"decline_fee {offer._id}"),
-    )
+    keyboard = offer_keyboard(offer._id, ("yes", "accept_fee"), ("no", "decline_fee"))
     answer = answer.format(amount=offer[sum_fee_field], currency=offer.escrow)
     await tg.send_message(chat_id, answer, reply_markup=keyboard)
     await states.Escrow.fee.set()
 
 
-@escrow_callback_handler(
-    lambda call: call.data.startswith("accept_insurance "), state=states.Escrow.amount
-)
+@escrow_callback_handler("accept_insurance", state=states.Escrow.amount)
 async def accept_insurance(call: types.CallbackQuery, offer: EscrowOffer):
     """Ask for fee payment agreement after accepting partial insurance."""
     await ask_fee(call.from_user.id, call.message.chat.id, offer)
 
 
-@escrow_callback_handler(
-    lambda call: call.data.startswith("init_cancel "), state=states.Escrow.amount
-)
+@escrow_callback_handler("init_cancel", state=states.Escrow.amount)
 async def init_cancel(call: types.CallbackQuery, offer: EscrowOffer):
     """Cancel offer on initiator's request."""
     await offer.delete_document()
@@ -280,12 +333,7 @@ async def ask_credentials(
                 request_user = offer.counter
                 answer_user = offer.init
                 currency = offer.buy
-            keyboard = InlineKeyboardMarkup()
-            keyboard.add(
-                InlineKeyboardButton(
-                    i18n("sent"), callback_data=f"card_sent {offer._id}"
-                )
-            )
+            keyboard = offer_keyboard(offer._id, ("sent", "card_sent"))
             mention = markdown.link(
                 answer_user["mention"], User(id=answer_user["id"]).url
             )
@@ -324,17 +372,13 @@ async def ask_credentials(
     await states.Escrow.receive_address.set()
 
 
-@escrow_callback_handler(
-    lambda call: call.data.startswith("accept_fee "), state=states.Escrow.fee
-)
+@escrow_callback_handler("accept_fee", state=states.Escrow.fee)
 async def pay_fee(call: types.CallbackQuery, offer: EscrowOffer):
     """Accept fee and start asking transfer information."""
     await ask_credentials(call, offer)
 
 
-@escrow_callback_handler(
-    lambda call: call.data.startswith("decline_fee "), state=states.Escrow.fee
-)
+@escrow_callback_handler("decline_fee", state=states.Escrow.fee)
 async def decline_fee(call: types.CallbackQuery, offer: EscrowOffer):
     """Decline fee and start asking transfer information."""
     if (call.from_user.id == offer.init["id"]) == (offer.type == "buy"):
@@ -345,9 +389,7 @@ async def decline_fee(call: types.CallbackQuery, offer: EscrowOffer):
     await ask_credentials(call, offer)
 
 
-@escrow_callback_handler(
-    lambda call: call.data.startswith("bank "), state=states.Escrow.bank
-)
+@escrow_callback_handler("bank", state=states.Escrow.bank)
 async def choose_bank(call: types.CallbackQuery, offer: EscrowOffer):
     """Set chosen bank and continue.
 
@@ -394,9 +436,7 @@ async def full_card_number_message(message: types.Message, offer: EscrowOffer):
     )
 
 
-@escrow_callback_handler(
-    lambda call: call.data.startswith("card_sent "), state=states.Escrow.full_card
-)
+@escrow_callback_handler("card_sent", state=states.Escrow.full_card)
 async def full_card_number_sent(call: types.CallbackQuery, offer: EscrowOffer):
     """Confirm that full card number is sent and ask for first and last 4 digits."""
     await offer.update_document({"$set": {"pending_input_from": call.from_user.id}})
@@ -479,21 +519,19 @@ async def set_receive_address(message: types.Message, offer: EscrowOffer):
         send_currency = offer.sell
         ask_name = offer.bank and offer.type == "buy"
 
-    await offer.update_document(
-        {"$set": {f"{user_field}.receive_address": message.text}}
-    )
     if ask_name:
-        await tg.send_message(
-            message.chat.id,
-            i18n("send_name_patronymic_surname"),
-        )
-        await states.Escrow.name.set()
+        answer = i18n("send_name_patronymic_surname")
+        next_state = states.Escrow.name
     else:
-        await tg.send_message(
-            message.chat.id,
-            i18n("ask_address {currency}").format(currency=send_currency),
-        )
-        await states.Escrow.send_address.set()
+        answer = i18n("ask_address {currency}").format(currency=send_currency)
+        next_state = states.Escrow.send_address
+    await asyncio.gather(
+        offer.update_document(
+            {"$set": {f"{user_field}.receive_address": message.text}}
+        ),
+        tg.send_message(message.chat.id, answer),
+    )
+    await next_state.set()
 
 
 @escrow_message_handler(state=states.Escrow.send_address)
@@ -533,13 +571,13 @@ async def set_name(message: types.Message, offer: EscrowOffer):
         user_field = "init"
         currency = offer.buy
 
-    await offer.update_document(
-        {"$set": {f"{user_field}.name": " ".join(name).upper()}}
-    )
-    await tg.send_message(
-        message.chat.id,
-        i18n("send_first_and_last_4_digits_of_card_number {currency}").format(
-            currency=currency
+    await asyncio.gather(
+        offer.update_document({"$set": {f"{user_field}.name": " ".join(name).upper()}}),
+        tg.send_message(
+            message.chat.id,
+            i18n("send_first_and_last_4_digits_of_card_number {currency}").format(
+                currency=currency
+            ),
         ),
     )
     await states.Escrow.send_card_number.set()
@@ -604,36 +642,37 @@ async def set_init_send_address(
             answer += "\n" + i18n("exceeded_insurance {amount} {currency}").format(
                 amount=insured, currency=offer.escrow
             )
-    await offer.update_document(
-        {"$set": update_dict, "$unset": {"pending_input_from": True}}
-    )
-    await tg.send_message(
-        offer.counter["id"],
-        answer,
-        reply_markup=buy_keyboard,
-        parse_mode=ParseMode.MARKDOWN,
-    )
-    sell_keyboard = InlineKeyboardMarkup()
-    sell_keyboard.add(
-        InlineKeyboardButton(i18n("cancel"), callback_data=f"escrow_cancel {offer._id}")
-    )
-    await tg.send_message(
-        message.from_user.id, i18n("offer_sent"), reply_markup=sell_keyboard
+    sell_keyboard = offer_keyboard(offer._id, ("cancel", "escrow_cancel"))
+    await asyncio.gather(
+        offer.update_document(
+            {"$set": update_dict, "$unset": {"pending_input_from": True}}
+        ),
+        tg.send_message(
+            offer.counter["id"],
+            answer,
+            reply_markup=buy_keyboard,
+            parse_mode=ParseMode.MARKDOWN,
+        ),
+        tg.send_message(
+            message.from_user.id, i18n("offer_sent"), reply_markup=sell_keyboard
+        ),
+        dp.current_state().finish(),
     )
-    await dp.current_state().finish()
 
 
-@escrow_callback_handler(lambda call: call.data.startswith("accept "))
+@escrow_callback_handler("accept")
 async def accept_offer(call: types.CallbackQuery, offer: EscrowOffer):
     """React to counteragent accepting offer by asking for fee payment agreement."""
-    await offer.update_document(
-        {"$set": {"pending_input_from": call.message.chat.id, "react_time": time()}}
+    await asyncio.gather(
+        offer.update_document(
+            {"$set": {"pending_input_from": call.message.chat.id, "react_time": time()}}
+        ),
+        call.answer(),
+        ask_fee(call.from_user.id, call.message.chat.id, offer),
     )
-    await call.answer()
-    await ask_fee(call.from_user.id, call.message.chat.id, offer)
 
 
-@escrow_callback_handler(lambda call: call.data.startswith("decline "))
+@escrow_callback_handler("decline")
 async def decline_offer(call: types.CallbackQuery, offer: EscrowOffer):
     """React to counteragent declining offer."""
     offer.react_time = time()
@@ -688,12 +727,13 @@ def create_memo(
         )
 
 
-@escrow_callback_handler(lambda call: call.data.startswith("check_transaction "))
+@escrow_callback_handler("check_transaction")
 async def check_transaction(call: types.CallbackQuery, offer: EscrowOffer):
     """Start transaction check."""
-    if offer.type == "buy":
+    offer_type = offer.type
+    if offer_type == "buy":
         from_address = offer.init["send_address"]
-    elif offer.type == "sell":
+    elif offer_type == "sell":
         from_address = offer.counter["send_address"]
     escrow_instance = get_escrow_instance(offer.escrow)
     await call.answer(i18n("transaction_check_starting"))
@@ -701,13 +741,18 @@ async def check_transaction(call: types.CallbackQuery, offer: EscrowOffer):
         offer_id=offer._id,
         from_address=from_address,
         amount_with_fee=offer["sum_fee_up"].to_decimal(),
-        amount_without_fee=offer[f"sum_{offer.type}"].to_decimal(),
+        amount_without_fee=offer[f"sum_{offer_type}"].to_decimal(),
         asset=offer.escrow,
         memo=offer.memo,
         transaction_time=offer.transaction_time,
     )
     if not success:
-        await tg.send_message(call.message.chat.id, i18n("transaction_not_found"))
+        answer = i18n("transaction_not_found")
+        # Reply in webhook response to avoid separate request to Telegram,
+        # unless outgoing requests have to be logged in database
+        if config.SET_WEBHOOK and not config.DATABASE_LOGGING_ENABLED:
+            return SendMessage(call.message.chat.id, answer)
+        await tg.send_message(call.message.chat.id, answer)
 
 
 async def set_counter_send_address(
@@ -718,14 +763,17 @@ async def set_counter_send_address(
     Ask for escrow asset transfer.
     """
     memo = create_memo(offer, transfer=False, counter_send_address=address)
-    if offer.type == "buy":
+    offer_type = offer.type
+    if offer_type == "buy":
         escrow_user = offer.init
         from_address = offer.init["send_address"]
         send_reply = True
-    elif offer.type == "sell":
+    elif offer_type == "sell":
         escrow_user = offer.counter
         from_address = address
         send_reply = False
+    locale = escrow_user["locale"]
+    sum_fee_up = offer["sum_fee_up"]
     keyboard = InlineKeyboardMarkup()
     escrow_instance = get_escrow_instance(offer.escrow)
     transaction_time = time()
@@ -733,8 +781,8 @@ async def set_counter_send_address(
         await escrow_instance.add_to_queue(
             offer_id=offer._id,
             from_address=from_address,
-            amount_with_fee=offer["sum_fee_up"].to_decimal(),
-            amount_without_fee=offer[f"sum_{offer.type}"].to_decimal(),
+            amount_with_fee=sum_fee_up.to_decimal(),
+            amount_without_fee=offer[f"sum_{offer_type}"].to_decimal(),
             asset=offer.escrow,
             memo=memo,
             transaction_time=transaction_time,
@@ -742,32 +790,27 @@ async def set_counter_send_address(
     else:
         keyboard.add(
             InlineKeyboardButton(
-                i18n("check", locale=escrow_user["locale"]),
+                i18n("check", locale=locale),
                 callback_data=f"check_transaction {offer._id}",
             )
         )
     keyboard.add(
         InlineKeyboardButton(
-            i18n("cancel", locale=escrow_user["locale"]),
+            i18n("cancel", locale=locale),
             callback_data=f"escrow_cancel {offer._id}",
         )
     )
     escrow_address = markdown.bold(escrow_instance.address)
-    answer = i18n(
-        "send {amount} {currency} {address}", locale=escrow_user["locale"]
-    ).format(amount=offer.sum_fee_up, currency=offer.escrow, address=escrow_address)
-    answer += " " + i18n("with_memo", locale=escrow_user["locale"])
+    answer = i18n("send {amount} {currency} {address}", locale=locale).format(
+        amount=sum_fee_up, currency=offer.escrow, address=escrow_address
+    )
+    answer += " " + i18n("with_memo", locale=locale)
     answer += ":\n" + markdown.code(memo)
     await tg.send_message(
         escrow_user["id"], answer, reply_markup=keyboard, parse_mode=ParseMode.MARKDOWN
     )
     if send_reply:
-        keyboard = InlineKeyboardMarkup()
-        keyboard.add(
-            InlineKeyboardButton(
-                i18n("cancel"), callback_data=f"escrow_cancel {offer._id}"
-            )
-        )
+        keyboard = offer_keyboard(offer._id, ("cancel", "escrow_cancel"))
         await tg.send_message(
             message.chat.id,
             i18n("transfer_information_sent")
@@ -787,7 +830,7 @@ async def set_counter_send_address(
     await dp.current_state().finish()
 
 
-@escrow_callback_handler(lambda call: call.data.startswith("escrow_cancel "))
+@escrow_callback_handler("escrow_cancel")
 async def cancel_offer(call: types.CallbackQuery, offer: EscrowOffer):
     """React to offer cancellation.
 
@@ -811,16 +854,28 @@ async def cancel_offer(call: types.CallbackQuery, offer: EscrowOffer):
     sell_answer = i18n("escrow_cancelled", locale=offer.init["locale"])
     buy_answer = i18n("escrow_cancelled", locale=offer.counter["locale"])
     offer.cancel_time = time()
+    cancel_keyboard_edit(offer._id)
     await offer.delete_document()
     await call.answer()
-    await tg.send_message(offer.init["id"], sell_answer, reply_markup=start_keyboard())
-    await tg.send_message(
-        offer.counter["id"], buy_answer, reply_markup=start_keyboard()
-    )
     sell_state = FSMContext(dp.storage, offer.init["id"], offer.init["id"])
     buy_state = FSMContext(dp.storage, offer.counter["id"], offer.counter["id"])
-    await sell_state.finish()
-    await buy_state.finish()
+    await asyncio.gather(
+        tg.send_message(offer.init["id"], sell_answer, reply_markup=start_keyboard()),
+        tg.send_message(offer.counter["id"], buy_answer, reply_markup=start_keyboard()),
+        sell_state.finish(),
+        buy_state.finish(),
+    )
+
+
+#: Scheduled keyboard edits by primary key value of offer document.
+keyboard_edits: typing.Dict[ObjectId, asyncio.TimerHandle] = {}
+
+
+def cancel_keyboard_edit(offer_id: ObjectId) -> None:
+    """Cancel scheduled keyboard edit of message connected with offer."""
+    handle = keyboard_edits.pop(offer_id, None)
+    if handle is not None:
+        handle.cancel()
 
 
 async def edit_keyboard(
@@ -833,12 +888,13 @@ async def edit_keyboard(
     :param message_id: Telegram ID of message.
     :param keyboard: New inline keyboard markup.
     """
+    keyboard_edits.pop(offer_id, None)
     offer_document = await database.escrow.find_one({"_id": offer_id})
     if offer_document:
         await tg.edit_message_reply_markup(chat_id, message_id, reply_markup=keyboard)
 
 
-@escrow_callback_handler(lambda call: call.data.startswith("tokens_sent "))
+@escrow_callback_handler("tokens_sent")
 async def final_offer_confirmation(call: types.CallbackQuery, offer: EscrowOffer):
     """Ask not escrow asset receiver to confirm transfer."""
     if not offer.unsent:
@@ -855,12 +911,8 @@ async def final_offer_confirmation(call: types.CallbackQuery, offer: EscrowOffer
         other_user = offer.init
         currency = offer.buy
 
-    keyboard = InlineKeyboardMarkup()
-    keyboard.add(
-        InlineKeyboardButton(
-            i18n("yes", locale=confirm_user["locale"]),
-            callback_data=f"escrow_complete {offer._id}",
-        )
+    keyboard = offer_keyboard(
+        offer._id, ("yes", "escrow_complete"), locale=confirm_user["locale"]
     )
     reply = await tg.send_message(
         confirm_user["id"],
@@ -875,7 +927,8 @@ async def final_offer_confirmation(call: types.CallbackQuery, offer: EscrowOffer
             callback_data=f"escrow_validate {offer._id}",
         )
     )
-    await call_later(
+    cancel_keyboard_edit(offer._id)
+    keyboard_edits[offer._id] = call_later(
         60 * 10,
         edit_keyboard,
         offer._id,
@@ -883,14 +936,16 @@ async def final_offer_confirmation(call: types.CallbackQuery, offer: EscrowOffer
         reply.message_id,
         keyboard,
     )
-    await call.answer()
-    await tg.send_message(
-        other_user["id"],
-        i18n(
-            "complete_escrow_promise",
-            locale=other_user["locale"],
+    await asyncio.gather(
+        call.answer(),
+        tg.send_message(
+            other_user["id"],
+            i18n(
+                "complete_escrow_promise",
+                locale=other_user["locale"],
+            ),
+            reply_markup=start_keyboard(),
         ),
-        reply_markup=start_keyboard(),
     )
 
 
@@ -931,7 +986,7 @@ async def add_cashback(
         await database.cashback.insert_many(cashback)
 
 
-@escrow_callback_handler(lambda call: call.data.startswith("escrow_complete "))
+@escrow_callback_handler("escrow_complete")
 @dp.async_task
 async def complete_offer(call: types.CallbackQuery, offer: EscrowOffer):
     """Release escrow asset and finish exchange."""
@@ -970,16 +1025,19 @@ async def complete_offer(call: types.CallbackQuery, offer: EscrowOffer):
         trx_url,
     )
     await offer.delete_document()
-    await tg.send_message(
-        recipient_user["id"],
-        recipient_answer,
-        reply_markup=start_keyboard(),
-        parse_mode=ParseMode.MARKDOWN,
+    cancel_keyboard_edit(offer._id)
+    await asyncio.gather(
+        tg.send_message(
+            recipient_user["id"],
+            recipient_answer,
+            reply_markup=start_keyboard(),
+            parse_mode=ParseMode.MARKDOWN,
+        ),
+        tg.send_message(sender_user["id"], answer, reply_markup=start_keyboard()),
     )
-    await tg.send_message(sender_user["id"], answer, reply_markup=start_keyboard())
 
 
-@escrow_callback_handler(lambda call: call.data.startswith("escrow_validate "))
+@escrow_callback_handler("escrow_validate")
 async def validate_offer(call: types.CallbackQuery, offer: EscrowOffer):
     """Ask support for manual verification of exchange."""
     if offer.type == "buy":
@@ -1005,9 +1063,12 @@ async def validate_offer(call: types.CallbackQuery, offer: EscrowOffer):
     )
     await tg.send_message(config.SUPPORT_CHAT_ID, answer, parse_mode=ParseMode.MARKDOWN)
     await offer.delete_document()
-    await call.answer()
-    await tg.send_message(
-        call.message.chat.id,
-        i18n("request_validation_promise"),
-        reply_markup=start_keyboard(),
+    cancel_keyboard_edit(offer._id)
+    await asyncio.gather(
+        call.answer(),
+        tg.send_message(
+            call.message.chat.id,
+            i18n("request_validation_promise"),
+            reply_markup=start_keyboard(),
+        ),
     )
@@ -15,8 +15,11 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with TellerBot.  If not, see <https://www.gnu.org/licenses/>.
 """Handlers for showing orders and reacting to query buttons attached to them."""
+import asyncio
+import re
 import typing
 from decimal import Decimal
+from functools import lru_cache
 from functools import wraps
 from time import time
 
@@ -39,6 +42,8 @@ from src.database import database
 from src.database import database_user
 from src.escrow import get_escrow_instance
 from src.escrow.escrow_offer import EscrowOffer
+from src.escrow.escrow_offer import forget_offer
+from src.handlers.base import order_cache
 from src.handlers.base import orders_list
 from src.handlers.base import private_handler
 from src.handlers.base import show_order
@@ -48,25 +53,52 @@ from src.i18n import plural_i18n
 OrderType = typing.Mapping[str, typing.Any]
 
 
+OBJECT_ID_REGEXP = re.compile(r"[a-f0-9]{24}", re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def parse_order_id(order_id: str) -> typing.Optional[ObjectId]:
+    """Return ``ObjectId`` of ``order_id`` or None if it is malformed."""
+    if OBJECT_ID_REGEXP.fullmatch(order_id):
+        return ObjectId(order_id)
+    return None
+
+
 def order_handler(
-    handler: typing.Callable[[types.CallbackQuery, OrderType], typing.Any]
+    handler: typing.Optional[
+        typing.Callable[[types.CallbackQuery, OrderType], typing.Any]
+    ] = None,
+    *,
+    projection: typing.Optional[typing.Mapping[str, bool]] = None,
+    cached: bool = False,
 ):
     """Simplify handling callback queries attached to order.
 
-    Add order of ``OrderType`` to arguments of ``handler``.
+    Add order of ``OrderType`` to arguments of ``handler``. If
+    ``projection`` is specified, order contains only projected fields.
+    If ``cached`` is true, recently shown order is used when available.
     """
 
-    @wraps(handler)
-    async def decorator(call: types.CallbackQuery):
-        order_id = call.data.split()[1]
-        order = await database.orders.find_one({"_id": ObjectId(order_id)})
-        if not order:
-            await call.answer(i18n("order_not_found"))
-            return
+    def decorator(
+        handler: typing.Callable[[types.CallbackQuery, OrderType], typing.Any]
+    ):
+        @wraps(handler)
+        async def wrapper(call: types.CallbackQuery):
+            order_id = parse_order_id(call.data.split()[1])
+            order = cached and order_cache.get(order_id)
+            if not order:
+                order = order_id and await database.orders.find_one(
+                    {"_id": order_id}, projection=projection
+                )
+            if not order:
+                await call.answer(i18n("order_not_found"))
+                return
+
+            return await handler(call, order)
 
-        return await handler(call, order)
+        return wrapper
 
-    return decorator
+    return decorator if handler is None else decorator(handler)
 
 
 async def show_orders(
@@ -120,15 +152,20 @@ async def get_order_button(call: types.CallbackQuery, order: OrderType):
 
 
 @private_handler(commands=["id"])
-@private_handler(regexp="(ID: )?[a-f0-9]{24}")
-async def get_order_command(message: types.Message):
+@private_handler(regexp=OBJECT_ID_REGEXP)
+async def get_order_command(
+    message: types.Message, regexp: typing.Optional[typing.Match] = None
+):
     """Get order from ID.
 
-    Order ID is indicated after **/id** or **ID:** in message text.
+    Order ID is indicated after **/id** or anywhere in message text.
     """
-    args = message.text.split()
-    order_id = args[1] if len(args) > 1 else args[0]
-    order = await database.orders.find_one({"_id": ObjectId(order_id)})
+    if regexp:
+        order_id = parse_order_id(regexp.group())
+    else:
+        args = message.text.split()
+        order_id = len(args) > 1 and parse_order_id(args[1])
+    order = order_id and await database.orders.find_one({"_id": order_id})
     if not order:
         await tg.send_message(message.chat.id, i18n("order_not_found"))
         return
@@ -138,14 +175,14 @@ async def get_order_command(message: types.Message):
 @dp.callback_query_handler(
     lambda call: call.data.startswith(("invert ", "revert ")), state=any_state
 )
-@order_handler
+@order_handler(cached=True)
 async def invert_button(call: types.CallbackQuery, order: OrderType):
     """React to invert button query."""
     args = call.data.split()
 
     invert = args[0] == "invert"
     location_message_id = int(args[2])
-    edit = bool(int(args[3]))
+    edit = args[3] == "1"
     show_id = call.message.text.startswith("ID")
 
     await call.answer()
@@ -198,7 +235,7 @@ async def orders_button(call: types.CallbackQuery):
         "$and": [
             {
                 "$or": [
-                    {"expiration_time": {"$exists": False}},
+                    {"expiration_time": None},
                     {"expiration_time": {"$gt": time()}},
                 ]
             },
@@ -210,7 +247,7 @@ async def orders_button(call: types.CallbackQuery):
 
     args = call.data.split()
     start = max(0, int(args[1]))
-    invert = bool(int(args[2]))
+    invert = args[2] == "1"
     await show_orders(
         call, cursor, start, quantity, "orders", invert, user_id=call.from_user.id
     )
@@ -227,7 +264,7 @@ async def my_orders_button(call: types.CallbackQuery):
 
     args = call.data.split()
     start = max(0, int(args[1]))
-    invert = bool(int(args[2]))
+    invert = args[2] == "1"
     await show_orders(call, cursor, start, quantity, "my_orders", invert)
 
 
@@ -238,7 +275,7 @@ async def matched_orders_button(call: types.CallbackQuery):
     """React to left/right button query in list of orders matched by currency pair."""
     args = call.data.split()
     start = max(0, int(args[3]))
-    invert = bool(int(args[4]))
+    invert = args[4] == "1"
     cursor, quantity = await aggregate_orders(args[1], args[2])
     await call.answer()
     await show_orders(
@@ -255,7 +292,7 @@ async def matched_orders_button(call: types.CallbackQuery):
 @dp.callback_query_handler(
     lambda call: call.data.startswith("similar "), state=any_state
 )
-@order_handler
+@order_handler(projection={"buy": True, "sell": True})
 async def similar_button(call: types.CallbackQuery, order: OrderType):
     """React to "Similar" button by sending list of similar orders.
 
@@ -274,7 +311,7 @@ async def similar_button(call: types.CallbackQuery, order: OrderType):
 
 
 @dp.callback_query_handler(lambda call: call.data.startswith("match "), state=any_state)
-@order_handler
+@order_handler(projection={"buy": True, "sell": True})
 async def match_button(call: types.CallbackQuery, order: OrderType):
     """React to "Match" button by sending list of matched orders.
 
@@ -308,7 +345,7 @@ async def escrow_button(call: types.CallbackQuery, order: OrderType):
 
     args = call.data.split()
     currency_arg = args[2]
-    edit = bool(int(args[3]))
+    edit = args[3] == "1"
 
     if currency_arg == "sum_buy":
         sum_currency = order["buy"]
@@ -325,7 +362,7 @@ async def escrow_button(call: types.CallbackQuery, order: OrderType):
     keyboard.row(
         types.InlineKeyboardButton(
             i18n("change_to {currency}").format(currency=new_currency),
-            callback_data="escrow {} {} 1".format(order["_id"], new_currency_arg),
+            callback_data=f"escrow {order['_id']} {new_currency_arg} 1",
         )
     )
     answer = i18n("send_exchange_sum {currency}").format(currency=sum_currency)
@@ -338,6 +375,7 @@ async def escrow_button(call: types.CallbackQuery, order: OrderType):
             {"pending_input_from": call.from_user.id},
             {"$set": {"sum_currency": currency_arg}},
         )
+        forget_offer()
         await call.answer()
         await tg.edit_message_text(
             answer, call.message.chat.id, call.message.message_id, reply_markup=keyboard
@@ -369,6 +407,7 @@ async def escrow_button(call: types.CallbackQuery, order: OrderType):
             },
         )
         await database.escrow.delete_many({"init.send_address": {"$exists": False}})
+        forget_offer()
         offer = EscrowOffer(
             **{
                 "_id": offer_id,
@@ -391,13 +430,14 @@ async def escrow_button(call: types.CallbackQuery, order: OrderType):
 
 
 @dp.callback_query_handler(lambda call: call.data.startswith("edit "), state=any_state)
+@dp.async_task
 async def edit_button(call: types.CallbackQuery):
     """React to "Edit" button by entering edit mode on order."""
     args = call.data.split()
 
-    order_id = args[1]
-    order = await database.orders.find_one(
-        {"_id": ObjectId(order_id), "user_id": call.from_user.id}
+    order_id = parse_order_id(args[1])
+    order = order_id and await database.orders.find_one(
+        {"_id": order_id, "user_id": call.from_user.id}
     )
     if not order:
         await call.answer(i18n("edit_order_error"))
@@ -466,7 +506,7 @@ async def edit_button(call: types.CallbackQuery):
                 "edit.order_id": order["_id"],
                 "edit.field": field,
                 "edit.location_message_id": int(args[3]),
-                "edit.one_time": bool(int(args[4])),
+                "edit.one_time": args[4] == "1",
                 "edit.show_id": call.message.text.startswith("ID"),
                 "state": states.field_editing.state,
             }
@@ -477,9 +517,12 @@ async def edit_button(call: types.CallbackQuery):
 async def finish_edit(user, update_dict):
     """Update and show order after editing."""
     edit = user["edit"]
-    result = await database.orders.update_one({"_id": edit["order_id"]}, update_dict)
-    if result.modified_count:
-        order = await database.orders.find_one({"_id": edit["order_id"]})
+    order = await database.orders.find_one_and_update(
+        {"_id": edit["order_id"]},
+        update_dict,
+        return_document=pymongo.ReturnDocument.AFTER,
+    )
+    if order:
         try:
             await show_order(
                 order,
@@ -497,6 +540,14 @@ async def finish_edit(user, update_dict):
     )
 
 
+async def delete_edit_message(user):
+    """Delete message asking new value of edited field if possible."""
+    try:
+        await tg.delete_message(user["chat"], user["edit"]["message_id"])
+    except MessageCantBeDeleted:
+        pass
+
+
 @dp.callback_query_handler(
     lambda call: call.data == "default_duration", state=states.field_editing
 )
@@ -505,19 +556,18 @@ async def default_duration(call: types.CallbackQuery, state: FSMContext):
     user = database_user.get()
     order = await database.orders.find_one({"_id": user["edit"]["order_id"]})
     await call.answer()
-    await finish_edit(
-        user,
-        {
-            "$set": {
-                "expiration_time": time() + order["duration"] * 24 * 60 * 60,
-                "notify": True,
-            }
-        },
+    await asyncio.gather(
+        finish_edit(
+            user,
+            {
+                "$set": {
+                    "expiration_time": time() + order["duration"] * 24 * 60 * 60,
+                    "notify": True,
+                }
+            },
+        ),
+        delete_edit_message(user),
     )
-    try:
-        await tg.delete_message(user["chat"], user["edit"]["message_id"])
-    except MessageCantBeDeleted:
-        return
 
 
 @dp.callback_query_handler(
@@ -532,14 +582,13 @@ async def unset_button(call: types.CallbackQuery, state: FSMContext):
     else:
         unset_dict = {field: True}
     await call.answer()
-    await finish_edit(user, {"$unset": unset_dict})
-    try:
-        await tg.delete_message(user["chat"], user["edit"]["message_id"])
-    except MessageCantBeDeleted:
-        return
+    await asyncio.gather(
+        finish_edit(user, {"$unset": unset_dict}), delete_edit_message(user)
+    )
 
 
 @private_handler(state=states.field_editing)
+@dp.async_task
 async def edit_field(message: types.Message, state: FSMContext):
     """Ask new value of chosen order's field during editing."""
     user = database_user.get()
@@ -549,17 +598,22 @@ async def edit_field(message: types.Message, state: FSMContext):
     set_dict = {}
     error = None
 
+    def normalized(value: Decimal) -> Decimal128:
+        return Decimal128(money.normalize(value))
+
     if field == "sum_buy":
         try:
             transaction_sum = money.money(message.text)
         except money.MoneyValueError as exception:
             error = str(exception)
         else:
-            order = await database.orders.find_one({"_id": edit["order_id"]})
+            order = await database.orders.find_one(
+                {"_id": edit["order_id"]}, projection={"price_sell": True}
+            )
             set_dict["sum_buy"] = Decimal128(transaction_sum)
             if "price_sell" in order:
-                set_dict["sum_sell"] = Decimal128(
-                    money.normalize(transaction_sum * order["price_sell"].to_decimal())
+                set_dict["sum_sell"] = normalized(
+                    transaction_sum * order["price_sell"].to_decimal()
                 )
 
     elif field == "sum_sell":
@@ -568,11 +622,13 @@ async def edit_field(message: types.Message, state: FSMContext):
         except money.MoneyValueError as exception:
             error = str(exception)
         else:
-            order = await database.orders.find_one({"_id": edit["order_id"]})
+            order = await database.orders.find_one(
+                {"_id": edit["order_id"]}, projection={"price_buy": True}
+            )
             set_dict["sum_sell"] = Decimal128(transaction_sum)
             if "price_buy" in order:
-                set_dict["sum_buy"] = Decimal128(
-                    money.normalize(transaction_sum * order["price_buy"].to_decimal())
+                set_dict["sum_buy"] = normalized(
+                    transaction_sum * order["price_buy"].to_decimal()
                 )
 
     elif field == "price":
@@ -581,33 +637,36 @@ async def edit_field(message: types.Message, state: FSMContext):
         except money.MoneyValueError as exception:
             error = str(exception)
         else:
-            order = await database.orders.find_one({"_id": edit["order_id"]})
+            order = await database.orders.find_one(
+                {"_id": edit["order_id"]},
+                projection={"sum_currency": True, "sum_buy": True, "sum_sell": True},
+            )
 
             if invert:
-                price_sell = money.normalize(Decimal(1) / price)
+                price_sell = money.normalize(money.ONE / price)
                 set_dict["price_buy"] = Decimal128(price)
                 set_dict["price_sell"] = Decimal128(price_sell)
 
                 if order.get("sum_currency") == "buy":
-                    set_dict["sum_sell"] = Decimal128(
-                        money.normalize(order["sum_buy"].to_decimal() * price_sell)
+                    set_dict["sum_sell"] = normalized(
+                        order["sum_buy"].to_decimal() * price_sell
                     )
                 elif "sum_sell" in order:
-                    set_dict["sum_buy"] = Decimal128(
-                        money.normalize(order["sum_sell"].to_decimal() * price)
+                    set_dict["sum_buy"] = normalized(
+                        order["sum_sell"].to_decimal() * price
                     )
             else:
-                price_buy = money.normalize(Decimal(1) / price)
+                price_buy = money.normalize(money.ONE / price)
                 set_dict["price_buy"] = Decimal128(price_buy)
                 set_dict["price_sell"] = Decimal128(price)
 
                 if order.get("sum_currency") == "sell":
-                    set_dict["sum_buy"] = Decimal128(
-                        money.normalize(order["sum_sell"].to_decimal() * price_buy)
+                    set_dict["sum_buy"] = normalized(
+                        order["sum_sell"].to_decimal() * price_buy
                     )
                 elif "sum_buy" in order:
-                    set_dict["sum_sell"] = Decimal128(
-                        money.normalize(order["sum_buy"].to_decimal() * price)
+                    set_dict["sum_sell"] = normalized(
+                        order["sum_buy"].to_decimal() * price
                     )
 
     elif field == "payment_system":
@@ -635,7 +694,6 @@ async def edit_field(message: types.Message, state: FSMContext):
                     limit=config.ORDER_DURATION_LIMIT
                 )
             else:
-                order = await database.orders.find_one({"_id": edit["order_id"]})
                 set_dict["duration"] = duration
                 set_dict["expiration_time"] = time() + duration * 24 * 60 * 60
                 set_dict["notify"] = True
@@ -653,12 +711,11 @@ async def edit_field(message: types.Message, state: FSMContext):
         set_dict["comments"] = comments
 
     if set_dict:
-        await finish_edit(user, {"$set": set_dict})
-        await message.delete()
-        try:
-            await tg.delete_message(user["chat"], edit["message_id"])
-        except MessageCantBeDeleted:
-            return
+        await asyncio.gather(
+            finish_edit(user, {"$set": set_dict}),
+            message.delete(),
+            delete_edit_message(user),
+        )
     elif error:
         await message.delete()
         await tg.edit_message_text(error, message.chat.id, edit["message_id"])
@@ -667,7 +724,7 @@ async def edit_field(message: types.Message, state: FSMContext):
 @dp.callback_query_handler(
     lambda call: call.data.startswith("archive "), state=any_state
 )
-@order_handler
+@order_handler(projection={"archived": True})
 async def archive_button(call: types.CallbackQuery, order: OrderType):
     """React to "Archive" or "Unarchive" button by flipping archived flag."""
     args = call.data.split()
@@ -678,7 +735,7 @@ async def archive_button(call: types.CallbackQuery, order: OrderType):
     else:
         update_dict = {"$set": {"archived": True, "notify": False}}
     order = await database.orders.find_one_and_update(
-        {"_id": ObjectId(args[1]), "user_id": call.from_user.id},
+        {"_id": order["_id"], "user_id": call.from_user.id},
         update_dict,
         return_document=pymongo.ReturnDocument.AFTER,
     )
@@ -702,7 +759,7 @@ async def archive_button(call: types.CallbackQuery, order: OrderType):
 @dp.callback_query_handler(
     lambda call: call.data.startswith("delete "), state=any_state
 )
-@order_handler
+@order_handler(projection={"_id": True})
 async def delete_button(call: types.CallbackQuery, order: OrderType):
     """React to "Delete" button by asking user to confirm deletion."""
     args = call.data.split()
@@ -713,16 +770,14 @@ async def delete_button(call: types.CallbackQuery, order: OrderType):
     keyboard.row(
         types.InlineKeyboardButton(
             i18n("totally_sure"),
-            callback_data="confirm_delete {} {}".format(
-                order["_id"], location_message_id
-            ),
+            callback_data=f"confirm_delete {order['_id']} {location_message_id}",
         )
     )
     keyboard.row(
         types.InlineKeyboardButton(
             i18n("no"),
-            callback_data="revert {} {} 0 {}".format(
-                order["_id"], location_message_id, int(show_id)
+            callback_data=(
+                f"revert {order['_id']} {location_message_id} 0 {int(show_id)}"
             ),
         )
     )
@@ -740,19 +795,21 @@ async def delete_button(call: types.CallbackQuery, order: OrderType):
 )
 async def confirm_delete_button(call: types.CallbackQuery):
     """Delete order after confirmation button query."""
-    order_id = call.data.split()[1]
-    order = await database.orders.find_one_and_delete(
-        {"_id": ObjectId(order_id), "user_id": call.from_user.id}
+    args = call.data.split()
+    order_id = parse_order_id(args[1])
+    order = order_id and await database.orders.find_one_and_delete(
+        {"_id": order_id, "user_id": call.from_user.id}
     )
     if not order:
         await call.answer(i18n("delete_order_error"))
         return
+    order_cache.pop(order_id, None)
 
-    location_message_id = int(call.data.split()[2])
+    location_message_id = int(args[2])
     keyboard = types.InlineKeyboardMarkup()
     keyboard.row(
         types.InlineKeyboardButton(
-            i18n("hide"), callback_data="hide {}".format(location_message_id)
+            i18n("hide"), callback_data=f"hide {location_message_id}"
         )
     )
     await tg.edit_message_text(
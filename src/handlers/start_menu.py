@@ -54,7 +54,7 @@ def locale_keyboard():
         keyboard.row(
             InlineKeyboardButton(
                 Locale(parse_locale(language)[0]).display_name,
-                callback_data="locale {}".format(language),
+                callback_data=f"locale {language}",
             )
         )
     return keyboard
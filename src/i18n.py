@@ -14,6 +14,7 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with TellerBot.  If not, see <https://www.gnu.org/licenses/>.
+import functools
 import gettext
 import typing
 from pathlib import Path
@@ -42,6 +43,11 @@ class I18nMiddlewareManual(I18nMiddleware):
             translation.add_fallback(translations[self.default])
         return translations
 
+    def reload(self):
+        """Reload translations and clear cache of ``static_i18n``."""
+        super().reload()
+        static_i18n.cache_clear()
+
     async def get_user_locale(
         self, action: str, args: typing.Tuple[typing.Any]
     ) -> typing.Optional[str]:
@@ -64,3 +70,14 @@ class I18nMiddlewareManual(I18nMiddleware):
 
 
 i18n = plural_i18n = I18nMiddlewareManual("bot", Path(__file__).parents[1] / "locale")
+
+
+@functools.lru_cache(maxsize=512)
+def static_i18n(singular: str, locale: str) -> str:
+    """Get translation of ``singular`` to ``locale`` and cache it.
+
+    Locale is always passed explicitly instead of being taken from the
+    current update, so cached result is valid anywhere. Intended for
+    messages without plural forms which are translated repeatedly.
+    """
+    return i18n(singular, locale=locale)
@@ -20,6 +20,7 @@ from decimal import Decimal
 
 from src.i18n import i18n
 
+ONE = Decimal(1)
 HIGH_EXP = Decimal("1e15")
 LOW_EXP = Decimal("1e-8")
 
@@ -32,7 +33,7 @@ def gateway_currency_regexp(currency):
 def normalize(money: Decimal, exp: Decimal = LOW_EXP) -> Decimal:
     """Round ``money`` to ``exp`` and strip trailing zeroes."""
     if money == money.to_integral_value():
-        return money.quantize(Decimal(1))
+        return money.quantize(ONE)
     return money.quantize(exp, rounding=decimal.ROUND_HALF_UP).normalize()
 
 